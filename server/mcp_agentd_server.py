@@ -1,20 +1,39 @@
 #!/usr/bin/env python3
+import asyncio
+import functools
 import os
+import re
+import shutil
+import signal
+import stat
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Dict, Any, List
-import secrets
-import datetime as _dt
+from typing import AbstractSet, Optional, Dict, Any, List, Tuple
 
 from mcp.server.fastmcp import FastMCP
 
 AGENTD_DIR = Path(os.environ.get("AGENTD_DIR", os.path.expanduser("~/.agentd")))
 # Prefer repo-local mcp_log, then env AGENTD_LOGDIR, then ~/.agentd/logs
 REPO_DIR = Path(__file__).resolve().parents[1]
+REPO_BIN = REPO_DIR / "bin"
 REPO_LOG_DIR = REPO_DIR / "mcp_log"
 ENV_LOG_DIR = Path(os.environ.get("AGENTD_LOGDIR", str(REPO_LOG_DIR)))
 HOME_LOG_DIR = AGENTD_DIR / "logs"
+# Saved agent pane written by agentd-bootstrap
+TARGET_FILE = AGENTD_DIR / "agent_pane"
 SESSION = os.environ.get("AGENTD_SESSION", "agentd")
 CLI_WINDOW = os.environ.get("AGENTD_CLI_WINDOW", "cli")
+# Resolved once: spares a $PATH walk per availability check and per spawn
+TMUX_BIN = shutil.which("tmux")
+# Environment for job-run, built once; tmux_run only overlays per-job keys.
+# Deliberately unfiltered: bin/ scripts read optional knobs (FILTER_CMD,
+# AGENT_NOTIFY_*, JOB_MAX_SEC, ...) and tmux needs PATH/TMUX/TMUX_TMPDIR.
+_BASE_ENV: Dict[str, str] = {**os.environ, "AGENTD_SESSION": SESSION}
 
 app = FastMCP(
     name="agentd",
@@ -22,102 +41,614 @@ app = FastMCP(
 )
 
 
-def _read_text(path: Path, fallback: str = "") -> str:
+def _read_text(path: str, fallback: str = "") -> str:
     try:
-        return path.read_text(encoding="utf-8", errors="replace")
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return f.read()
     except Exception:
         return fallback
 
 
-def _job_rc_path(token: str) -> Path:
-    return AGENTD_DIR / f"{token}.rc"
+def _tail_lines(path: str, n: int, blocksize: int = 8192) -> str:
+    """Return the last n lines of path, reading blocks backwards from EOF."""
+    if n <= 0:
+        return ""
+    blocks: deque = deque()
+    newlines = 0
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        # One extra newline guarantees the first returned line is complete
+        while pos > 0 and newlines <= n:
+            size = min(blocksize, pos)
+            pos -= size
+            f.seek(pos)
+            block = f.read(size)
+            blocks.appendleft(block)
+            newlines += block.count(b"\n")
+    lines = b"".join(blocks).splitlines()[-n:]
+    return b"\n".join(lines).decode("utf-8", errors="replace")
+
+
+def _tail_bytes(path: str, n: int, size: int) -> str:
+    """Return the last n bytes of path (size bytes long), without reading the rest."""
+    if n <= 0:
+        return ""
+    with open(path, "rb") as f:
+        f.seek(max(0, size - n))
+        data = f.read(n)
+    if size > n:
+        # Started mid-file: drop a UTF-8 sequence cut in half by the seek
+        i = 0
+        while i < 3 and i < len(data) and data[i] & 0xC0 == 0x80:
+            i += 1
+        data = data[i:]
+    return data.decode("utf-8", errors="replace")
+
+
+# Latest read per (path, tail, tail_bytes) -> (mtime_ns, size, text), so
+# polling an unchanged log costs one stat. Results over _LOG_CACHE_ENTRY_MAX
+# chars are never kept (logs can be hundreds of MB): at up to 4 bytes per
+# char that bounds the cache to 32 entries x 4 MiB.
+_LOG_CACHE_MAX = 32
+_LOG_CACHE_ENTRY_MAX = 1 << 20
+_LOG_CACHE: Dict[Tuple[str, Optional[int], Optional[int]], Tuple[int, int, str]] = {}
+_LOG_CACHE_LOCK = threading.Lock()
+
+
+def _log_text(path: str, tail: Optional[int] = None, tail_bytes: Optional[int] = None) -> str:
+    """Full log text, its last `tail` lines or last `tail_bytes` bytes; "" if missing."""
+    key = (path, tail, tail_bytes)
+    try:
+        st = os.stat(path)
+        if not stat.S_ISREG(st.st_mode):
+            return ""
+        with _LOG_CACHE_LOCK:
+            hit = _LOG_CACHE.pop(key, None)
+            if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                _LOG_CACHE[key] = hit  # re-insert as most recently used
+                return hit[2]
+        if tail_bytes is not None:
+            text = _tail_bytes(path, tail_bytes, st.st_size)
+        elif tail is not None:
+            text = _tail_lines(path, tail)
+        else:
+            text = _read_text(path)
+    except OSError:
+        return ""
+    if len(text) > _LOG_CACHE_ENTRY_MAX:
+        return text
+    with _LOG_CACHE_LOCK:
+        _LOG_CACHE[key] = (st.st_mtime_ns, st.st_size, text)
+        while len(_LOG_CACHE) > _LOG_CACHE_MAX:
+            del _LOG_CACHE[next(iter(_LOG_CACHE))]
+    return text
+
+
+# Job paths are built as plain strings; Path objects only cost allocations here
+_AGENTD_DIR_STR = str(AGENTD_DIR)
 
 
-def _candidate_log_dirs() -> List[Path]:
+def _job_rc_path(token: str) -> str:
+    return f"{_AGENTD_DIR_STR}/{token}.rc"
+
+
+@functools.lru_cache(maxsize=None)
+def _candidate_log_dirs() -> Tuple[Path, ...]:
     # Order: repo mcp_log -> env-provided -> ~/.agentd/logs
     dirs = []
     if REPO_LOG_DIR:
         dirs.append(REPO_LOG_DIR)
     if ENV_LOG_DIR and ENV_LOG_DIR != REPO_LOG_DIR:
         dirs.append(ENV_LOG_DIR)
-    if HOME_LOG_DIR:
+    # Skip duplicates so the listing scans never read a dir twice
+    if HOME_LOG_DIR and HOME_LOG_DIR not in dirs:
         dirs.append(HOME_LOG_DIR)
-    return dirs
+    return tuple(dirs)
+
 
+# Fixed for the life of the process: computed once at import
+_CANDIDATE_LOG_DIRS = _candidate_log_dirs()
+# String forms for the per-token probes (no Path built per candidate)
+_CAND_LOG_STRS = tuple(str(d) for d in _CANDIDATE_LOG_DIRS)
+# Where a job's log goes when none exists yet: repo-local mcp_log (first in list)
+_DEFAULT_LOG_DIR = str(_CANDIDATE_LOG_DIRS[0] if _CANDIDATE_LOG_DIRS else HOME_LOG_DIR)
 
-def _job_log_path(token: str) -> Path:
-    for d in _candidate_log_dirs():
-        p = Path(d) / f"{token}.log"
-        if p.exists():
+
+def _find_job_log(token: str) -> Optional[str]:
+    """Existing log file for token in the first candidate dir, else None."""
+    for d in _CAND_LOG_STRS:
+        p = f"{d}/{token}.log"
+        if os.path.isfile(p):
             return p
-    # Fallback: default to repo-local mcp_log path (first in list)
-    base = _candidate_log_dirs()[0] if _candidate_log_dirs() else HOME_LOG_DIR
-    return Path(base) / f"{token}.log"
+    return None
+
+
+def _job_log_path(token: str) -> str:
+    return _find_job_log(token) or f"{_DEFAULT_LOG_DIR}/{token}.log"
 
 
 # (Removed) _shell_quote: not used.
 
 
-def _list_job_tokens() -> List[str]:
-    if not AGENTD_DIR.exists():
-        return []
-    toks: List[str] = []
-    for p in AGENTD_DIR.glob("*.rc"):
-        toks.append(p.stem)
-    # Include logs without rc as well across all known log dirs
-    for d in _candidate_log_dirs():
-        if Path(d).exists():
-            toks.extend([p.stem for p in Path(d).glob("*.log")])
-    return sorted(set(toks))
+def _scan_dir(d: str, suffix: str) -> Dict[str, str]:
+    """Map stem -> path for the entries of d ending in suffix ({} if d is unreadable)."""
+    # os.scandir avoids a Path object (and glob matching) per directory entry
+    found: Dict[str, str] = {}
+    cut = -len(suffix)
+    try:
+        with os.scandir(d) as it:
+            for e in it:
+                n = e.name
+                if n.endswith(suffix):
+                    found[n[:cut]] = e.path
+    except OSError:
+        # Missing, not a directory (AGENTD_LOGDIR pointing at a file), or
+        # unreadable: list nothing, as Path.glob did
+        pass
+    return found
+
+
+# The rc dir and the log dirs are scanned concurrently (scandir releases the
+# GIL), so one slow log dir, e.g. on a network mount, does not add up.
+_SCAN_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agentd-scan")
+
+
+def _scan_job_files() -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+    """rc files in AGENTD_DIR, and log files per candidate dir (in order)."""
+    rcs = _SCAN_POOL.submit(_scan_dir, _AGENTD_DIR_STR, ".rc")
+    logs = list(_SCAN_POOL.map(_scan_dir, _CAND_LOG_STRS, [".log"] * len(_CAND_LOG_STRS)))
+    return rcs.result(), logs
+
+
+def _read_rc(path: str) -> Optional[int]:
+    """Read a job exit code file; None if missing or not yet an integer."""
+    # rc files hold a single integer: skip the text I/O stack
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            return int(os.read(fd, 32).strip())
+        finally:
+            os.close(fd)
+    except (OSError, ValueError):
+        return None
+
+
+# Polling cache: token -> (expires_at, status), least recently used first.
+# Running jobs are re-read after the TTL; finished ones stay valid while
+# their rc file exists. Stale entries are dropped on lookup.
+_STATUS_TTL = 0.5
+_STATUS_CACHE_MAX = 256
+_STATUS_CACHE: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_STATUS_CACHE_LOCK = threading.Lock()
 
 
 def _job_status(token: str) -> Dict[str, Any]:
+    now = time.monotonic()
+    with _STATUS_CACHE_LOCK:
+        hit = _STATUS_CACHE.pop(token, None)
+    if hit:
+        expires, cached = hit
+        # job-clean removes the rc file: one stat instead of re-reading
+        if (os.path.exists(cached["rc_path"]) if cached["rc"] is not None else now < expires):
+            with _STATUS_CACHE_LOCK:
+                _STATUS_CACHE[token] = hit  # re-insert as most recently used
+            return cached
     rc_path = _job_rc_path(token)
-    log_path = _job_log_path(token)
-    rc_val: Optional[int] = None
-    if rc_path.exists():
-        try:
-            rc_val = int(rc_path.read_text().strip())
-        except Exception:
-            rc_val = None
+    # The probe that locates the log also answers has_log: no second stat
+    found = _find_job_log(token)
+    log_path = found or f"{_DEFAULT_LOG_DIR}/{token}.log"
+    rc_val = _read_rc(rc_path)
     status = {
         "token": token,
         "rc": rc_val,
-        "has_log": log_path.exists(),
-        "rc_path": str(rc_path),
-        "log_path": str(log_path),
+        "has_log": found is not None,
+        "rc_path": rc_path,
+        "log_path": log_path,
     }
+    with _STATUS_CACHE_LOCK:
+        _STATUS_CACHE[token] = (now + _STATUS_TTL, status)
+        while len(_STATUS_CACHE) > _STATUS_CACHE_MAX:
+            del _STATUS_CACHE[next(iter(_STATUS_CACHE))]
     return status
 
 
-def _bin(path: str) -> Path:
-    return Path(__file__).resolve().parents[1] / "bin" / path
+def _all_job_status() -> Dict[str, Dict[str, Any]]:
+    """Status of every known job, keyed by token (same fields as _job_status).
 
+    Built from one scandir per directory instead of per-token exists() calls.
+    """
+    rc_files, log_files = _scan_job_files()
+    rcs = {tok: _read_rc(p) for tok, p in rc_files.items()}
+    logs: Dict[str, str] = {}
+    for found in log_files:
+        for tok, p in found.items():
+            # First candidate dir wins, as in _job_log_path
+            logs.setdefault(tok, p)
+    jobs: Dict[str, Dict[str, Any]] = {}
+    for tok in sorted(rcs.keys() | logs.keys()):
+        jobs[tok] = {
+            "token": tok,
+            "rc": rcs.get(tok),
+            "has_log": tok in logs,
+            "rc_path": _job_rc_path(tok),
+            "log_path": logs.get(tok) or f"{_DEFAULT_LOG_DIR}/{tok}.log",
+        }
+    return jobs
+
+
+@functools.lru_cache(maxsize=None)
+def _bin(path: str) -> Path:
+    return REPO_BIN / path
+
+
+# Persistent control-mode client (`tmux -C`): each query becomes a line
+# written to its stdin and a %begin/%end block read back, instead of a
+# process spawn. Opened on first use and reopened after it dies (e.g. its
+# session was killed), at most once per _CTL_RETRY seconds while attaching
+# fails; _tmux_query falls back to spawning tmux in the meantime.
+_CTL_LOCK = threading.Lock()
+_CTL_PROC: Optional[subprocess.Popen] = None
+_CTL_RETRY = 5.0
+_CTL_NEXT_OPEN = 0.0
+# Counter for the sync marker that closes every write (see _ctl_cmd)
+_CTL_SEQ = 0
+# The channel attaches to a private session: attaching stamps
+# session_last_attached (which outlives the channel), so attaching to a
+# user session would make it look "most recently attached" to _auto_session.
+# Shared by all servers, left in place, and never ranked or targeted.
+_CTL_SESSION = "_agentd-ctl"
+
+
+def _ctl_read(proc: subprocess.Popen) -> Optional[Tuple[bool, List[str], bool]]:
+    """Read one %begin..%end/%error block as (ok, lines, ours).
+
+    ours is True when the block answers a command this client wrote (%begin
+    flags 1). None if the client went away.
+    """
+    tag: Optional[str] = None
+    lines: List[str] = []
+    while True:
+        raw = proc.stdout.readline()
+        if not raw:
+            return None
+        line = raw.decode("utf-8", errors="replace").rstrip("\n")
+        if tag is None:
+            # Skip asynchronous notifications (%session-changed, ...) between blocks
+            if line.startswith("%begin "):
+                tag = line[len("%begin "):]
+            continue
+        if line == f"%end {tag}":
+            return True, lines, tag.endswith(" 1")
+        if line == f"%error {tag}":
+            return False, lines, tag.endswith(" 1")
+        lines.append(line)
+
+
+def _ctl_open() -> Optional[subprocess.Popen]:
+    # Only when a tmux server is already up: creating the private session
+    # must not start one (spawned, not through the channel: _CTL_LOCK is held)
+    if _tmux_spawn(["list-sessions", "-F", "#{session_name}"]) is None:
+        return None
+    try:
+        # -A: attach if another server already created it; `cat` just idles
+        proc = subprocess.Popen(
+            [TMUX_BIN, "-C", "new-session", "-A", "-s", _CTL_SESSION, "cat"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        return None
+    try:
+        # The new-session/attach itself is answered with one block
+        first = _ctl_read(proc)
+        if first is not None and first[0]:
+            # Pane output is never needed here; older tmux answers %error, which is fine
+            proc.stdin.write(b"refresh-client -f no-output\n")
+            proc.stdin.flush()
+            if _ctl_read(proc) is not None:
+                return proc
+    except (OSError, ValueError):
+        pass
+    proc.kill()
+    proc.wait()
+    return None
 
-def _tmux_ok() -> bool:
-    from shutil import which
-    return which("tmux") is not None
 
+def _ctl_cmd(cmds: List[str]) -> Optional[Tuple[bool, List[str]]]:
+    """Send tmux command lines over the control channel in one write.
 
-def _target_file() -> Path:
-    return AGENTD_DIR / "agent_pane"
+    Each line is answered by its own block. Returns (all_ok, output_lines
+    of every block in order), or None when the channel is unavailable.
+    """
+    global _CTL_PROC, _CTL_NEXT_OPEN, _CTL_SEQ
+    with _CTL_LOCK:
+        if _CTL_PROC is None:
+            now = time.monotonic()
+            if now < _CTL_NEXT_OPEN:
+                return None
+            _CTL_PROC = _ctl_open()
+            if _CTL_PROC is None:
+                _CTL_NEXT_OPEN = now + _CTL_RETRY
+                return None
+        res: Optional[Tuple[bool, List[str]]] = None
+        # %begin numbers come from a server-wide counter and cannot be
+        # predicted, so a trailing marker pairs the replies with this write:
+        # exactly one block per command must precede it, else the channel is
+        # out of step (a line tmux split in two, ...) and is dropped.
+        _CTL_SEQ += 1
+        marker = f"agentd-sync-{_CTL_SEQ}"
+        try:
+            _CTL_PROC.stdin.write(
+                "".join(c + "\n" for c in cmds).encode("utf-8")
+                + f"display-message -p {marker}\n".encode()
+            )
+            _CTL_PROC.stdin.flush()
+            ok, lines, n = True, [], 0
+            while n <= len(cmds):
+                block = _ctl_read(_CTL_PROC)
+                if block is None:
+                    break
+                b_ok, b_lines, ours = block
+                if not ours:
+                    continue
+                if b_lines == [marker]:
+                    if n == len(cmds):
+                        res = (ok, lines)
+                    break
+                n += 1
+                ok = ok and b_ok
+                lines.extend(b_lines)
+        except (OSError, ValueError):
+            res = None
+        if res is None:
+            _CTL_PROC.kill()
+            _CTL_PROC.wait()
+            _CTL_PROC = None
+        return res
+
+
+def _tmux_quote(arg: str) -> str:
+    # tmux's command parser takes shell-like single quotes
+    return "'" + arg.replace("'", "'\\''") + "'"
+
+
+def _tmux_query(args: List[str]) -> Optional[str]:
+    """Run `tmux <args>` and return its stdout, or None if it failed.
+
+    args may chain several commands with ";" elements, as on the tmux
+    command line. Goes through the control channel when available,
+    otherwise spawns tmux (_tmux_spawn).
+    """
+    if TMUX_BIN is None:
+        return None
+    # One control-mode line per command, so a failing command cannot leave
+    # us waiting for blocks tmux skipped
+    cmds: List[List[str]] = [[]]
+    for a in args:
+        if a == ";":
+            cmds.append([])
+        else:
+            cmds[-1].append(a)
+    res = None
+    # tmux reads control-mode input line by line, so an argument with a line
+    # break (e.g. a user-supplied target) would split its command in two
+    if not any("\n" in a or "\r" in a for a in args):
+        res = _ctl_cmd([" ".join(_tmux_quote(a) for a in c) for c in cmds])
+    if res is not None:
+        ok, lines = res
+        return "".join(l + "\n" for l in lines) if ok else None
+    return _tmux_spawn(args)
+
+
+def _tmux_spawn(args: List[str]) -> Optional[str]:
+    """Run `tmux <args>` as a child process; its stdout, or None if it failed.
+
+    Uses posix_spawn (vfork+exec on glibc) rather than subprocess'
+    fork+exec so the per-query cost does not grow with the server's heap.
+    """
+    r, w = os.pipe()
+    try:
+        pid = os.posix_spawn(
+            TMUX_BIN,
+            ["tmux", *args],
+            os.environ,
+            file_actions=[
+                (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+                (os.POSIX_SPAWN_DUP2, w, 1),
+                (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+            ],
+        )
+    except OSError:
+        os.close(r)
+        return None
+    finally:
+        os.close(w)
+    with os.fdopen(r, "rb") as f:
+        data = f.read()
+    _, status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0:
+        return None
+    return data.decode("utf-8", errors="replace")
 
 
 def _read_target() -> Optional[str]:
-    p = _target_file()
-    if not p.exists():
+    p = TARGET_FILE
+    if not os.path.isfile(p):
         return None
     t = p.read_text().strip()
     return t or None
 
 
+# pane_id <TAB> session:win.pane <TAB> pane_current_path
+_PANE_FMT = "#{pane_id}\t#{session_name}:#{window_index}.#{pane_index}\t#{pane_current_path}"
+_FMT_SESSION = "#{session_last_attached} #{session_created} #{session_name}"
+_FMT_CLIENT = "#{client_control_mode} #{client_activity} #{client_session}"
+# "win.pane <field>" lines for the per-session pane pickers
+_FMT_PANE_ACTIVE = "#{window_index}.#{pane_index} #{?pane_active,1,0}"
+_FMT_PANE_COMMAND = "#{window_index}.#{pane_index} #{pane_current_command}"
+_SHELLS = frozenset({"bash", "zsh", "fish", "sh", "nu"})
+# Targets that name exactly one pane, so absence from the pane set is conclusive
+_CANONICAL_PANE_RE = re.compile(r"%\d+|[^:]+:\d+\.\d+")
+
+
+@dataclass
+class _TmuxSnapshot:
+    # session:win.pane, session:window_name.pane and %pane_id -> pane_current_path
+    panes: Dict[str, str] = field(default_factory=dict)
+    # (session_last_attached or -1, session_created, session_name)
+    sessions: List[Tuple[int, int, str]] = field(default_factory=list)
+    # (client_activity, client_session)
+    clients: List[Tuple[int, str]] = field(default_factory=list)
+
+
+# Back-to-back tool calls share one snapshot instead of re-querying tmux.
+# The lock is held across the fetch, so concurrent cold callers (tmux_run's
+# saved-pane check and its own snapshot fetch) wait for a single query.
+_SNAPSHOT_TTL = 0.2
+_SNAPSHOT_CACHE: Optional[Tuple[float, _TmuxSnapshot]] = None
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def _tmux_snapshot() -> _TmuxSnapshot:
+    """Collect pane/session/client metadata in a single chained tmux call.
+
+    Cached for _SNAPSHOT_TTL seconds; returns an empty snapshot without tmux.
+    """
+    global _SNAPSHOT_CACHE
+    if TMUX_BIN is None:
+        return _TmuxSnapshot()
+    with _SNAPSHOT_LOCK:
+        now = time.monotonic()
+        if _SNAPSHOT_CACHE and now - _SNAPSHOT_CACHE[0] < _SNAPSHOT_TTL:
+            return _SNAPSHOT_CACHE[1]
+        snap = _fetch_tmux_snapshot()
+        _SNAPSHOT_CACHE = (now, snap)
+        return snap
+
+
+def _fetch_tmux_snapshot() -> _TmuxSnapshot:
+    snap = _TmuxSnapshot()
+    # Output lines are tagged P(ane)/S(ession)/C(lient) to demultiplex them
+    out = _tmux_query([
+        "list-panes", "-a", "-F", "P " + _PANE_FMT + "\t#{window_name}", ";",
+        "list-sessions", "-F", "S " + _FMT_SESSION, ";",
+        "list-clients", "-F", "C " + _FMT_CLIENT,
+    ])
+    # session:window_name.pane -> (window target, cwd); None once ambiguous
+    named: Dict[str, Optional[Tuple[str, str]]] = {}
+    for l in (out or "").splitlines():
+        tag, body = l[:2], l[2:]
+        if tag == "P ":
+            pane_id, _, rest = body.partition("\t")
+            tgt, _, rest = rest.partition("\t")
+            cwd, _, wname = rest.rpartition("\t")
+            snap.panes[tgt] = cwd
+            snap.panes[pane_id] = cwd
+            # Saved targets name the window (agentd:cli.0); numeric names
+            # would be read as indices, and tmux rejects duplicated names
+            sess, _, widx = tgt.rpartition(":")
+            if wname and not wname.isdigit():
+                key = f"{sess}:{wname}.{widx.partition('.')[2]}"
+                win = tgt.rpartition(".")[0]
+                prev = named.get(key, (win, cwd))
+                named[key] = (win, cwd) if prev and prev[0] == win else None
+        elif tag == "S ":
+            last, _, rest = body.partition(" ")
+            created, _, name = rest.partition(" ")
+            # The control channel's private session is never a candidate
+            if name == _CTL_SESSION:
+                continue
+            try:
+                snap.sessions.append((int(last) if last else -1, int(created), name))
+            except ValueError:
+                continue
+        elif tag == "C ":
+            # Skip control-mode clients (including our own channel)
+            ctl, _, rest = body.partition(" ")
+            if ctl == "1":
+                continue
+            ts, _, name = rest.partition(" ")
+            try:
+                snap.clients.append((int(ts), name))
+            except ValueError:
+                continue
+    for key, hit in named.items():
+        if hit:
+            snap.panes.setdefault(key, hit[1])
+    return snap
+
+
+# Short-lived cache of pane existence checks: target -> (checked_at, exists).
+# Bursts of tool calls otherwise spawn one `tmux list-panes` per call.
+_PANE_CACHE_TTL = 0.5
+_PANE_CACHE: Dict[str, Tuple[float, bool]] = {}
+_PANE_CACHE_LOCK = threading.Lock()
+
+
+def _valid_panes_set() -> AbstractSet[str]:
+    """All live panes (session:win.pane and %id) from the cached snapshot."""
+    return _tmux_snapshot().panes.keys()
+
+
 def _tmux_pane_exists(target: str) -> bool:
-    import subprocess
-    try:
-        subprocess.run(["tmux", "list-panes", "-t", target], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    valid = _valid_panes_set()
+    if target in valid:
         return True
-    except Exception:
+    if valid and _CANONICAL_PANE_RE.fullmatch(target):
+        return False
+    # Other target forms (window names, bare sessions, ...): ask tmux directly
+    now = time.monotonic()
+    with _PANE_CACHE_LOCK:
+        hit = _PANE_CACHE.get(target)
+        if hit and now - hit[0] < _PANE_CACHE_TTL:
+            return hit[1]
+    if _tmux_query(["list-panes", "-t", target]) is None:
+        # Pane is gone: drop any stale positive entry instead of caching the miss
+        with _PANE_CACHE_LOCK:
+            _PANE_CACHE.pop(target, None)
         return False
+    with _PANE_CACHE_LOCK:
+        _PANE_CACHE[target] = (now, True)
+    return True
+
+
+# Last-known-good saved agent pane: back-to-back runs skip the file read
+# and the pane check within the TTL.
+_BOOT_TTL = 1.0
+_BOOT_CACHE: Optional[Tuple[float, str]] = None
+
+
+def _saved_target() -> Optional[str]:
+    """Saved agent pane (~/.agentd/agent_pane) if it still exists, else None."""
+    global _BOOT_CACHE
+    now = time.monotonic()
+    cached = _BOOT_CACHE
+    if cached and now - cached[0] < _BOOT_TTL:
+        return cached[1]
+    saved = _read_target()
+    if saved and _tmux_pane_exists(saved):
+        _BOOT_CACHE = (now, saved)
+        return saved
+    _BOOT_CACHE = None
+    return None
+
+
+def _pane_info(target: str) -> Optional[Tuple[str, str]]:
+    """Resolve target to (session:win.pane, pane_current_path) in one tmux call.
+
+    Doubles as the existence check: None if the pane does not exist.
+    """
+    out = _tmux_query(["display-message", "-p", "-t", target, _PANE_FMT])
+    pane_id, _, rest = (out or "").rstrip("\n").partition("\t")
+    canonical, _, cwd = rest.partition("\t")
+    # display-message succeeds even for unknown targets: it prints empty
+    # fields for an unknown session, but falls back to another pane for an
+    # unknown window/pane index, so canonical targets must resolve to themselves
+    if not pane_id or (_CANONICAL_PANE_RE.fullmatch(target) and target not in (pane_id, canonical)):
+        return None
+    return canonical, cwd
 
 
 def _detect_self_pane() -> Optional[str]:
@@ -125,24 +656,19 @@ def _detect_self_pane() -> Optional[str]:
 
     Requires TMUX_PANE to be set (server launched inside tmux).
     """
-    if not _tmux_ok():
+    if TMUX_BIN is None:
         return None
-    import subprocess
     pane_env = os.environ.get("TMUX_PANE")
-    fmt = "#{session_name}:#{window_index}.#{pane_index}"
-    try:
-        if not pane_env:
-            return None
-        out = subprocess.run(["tmux", "display-message", "-p", "-t", pane_env, fmt], capture_output=True, text=True, check=True)
-        target = out.stdout.strip()
-        if target and _tmux_pane_exists(target):
-            return target
-    except Exception:
+    if not pane_env:
         return None
-    return None
+    info = _pane_info(pane_env)
+    return info[0] if info else None
 
 
-SELF_PANE = _detect_self_pane()
+# Resolved on first use (only tmux_run's fallback needs it), not at import
+@functools.lru_cache(maxsize=1)
+def _self_pane() -> Optional[str]:
+    return _detect_self_pane()
 
 
 # Removed unused bootstrap helper; pane targeting is resolved dynamically in tmux_run.
@@ -154,7 +680,7 @@ SELF_PANE = _detect_self_pane()
 # Removed unused CLI pane helpers.
 
 
-def _auto_session() -> Optional[str]:
+def _auto_session(snapshot: Optional[_TmuxSnapshot] = None) -> Optional[str]:
     """Pick an automatic session based on recent user activity.
 
     Priority:
@@ -162,192 +688,194 @@ def _auto_session() -> Optional[str]:
       2) Most recently attached session
       3) Most recently created session
     """
-    if not _tmux_ok():
+    if TMUX_BIN is None:
         return None
-    import subprocess
+    snap = snapshot or _tmux_snapshot()
     # 1) Most recently active client
-    try:
-        out = subprocess.run(
-            [
-                "tmux",
-                "list-clients",
-                "-F",
-                "#{client_activity} #{client_session}",
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        lines = [l.strip() for l in out.stdout.splitlines() if l.strip()]
-        if lines:
-            sess = sorted(lines, key=lambda s: int(s.split()[0]), reverse=True)[0].split()[1]
-            if sess:
-                return sess
-    except Exception:
-        pass
-    # 2) Most recently attached session
-    try:
-        out = subprocess.run(
-            [
-                "tmux",
-                "list-sessions",
-                "-F",
-                "#{session_last_attached} #{session_name}",
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        pairs = []
-        for l in out.stdout.splitlines():
-            l = l.strip()
-            if not l:
-                continue
-            ts, name = l.split(maxsplit=1)
-            try:
-                tsv = int(ts)
-            except Exception:
-                continue
-            if tsv != -1:
-                pairs.append((tsv, name))
-        if pairs:
-            return sorted(pairs, key=lambda x: x[0], reverse=True)[0][1]
-    except Exception:
-        pass
-    # 3) Most recently created session
-    try:
-        out = subprocess.run(
-            [
-                "tmux",
-                "list-sessions",
-                "-F",
-                "#{session_created} #{session_name}",
-            ],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        lines = [l.strip() for l in out.stdout.splitlines() if l.strip()]
-        if lines:
-            return sorted(lines, key=lambda s: int(s.split()[0]), reverse=True)[0].split()[1]
-    except Exception:
-        pass
-    return None
+    if snap.clients:
+        sess = max(snap.clients, key=lambda c: c[0])[1]
+        if sess:
+            return sess
+    if not snap.sessions:
+        return None
+    # 2) Most recently attached session (-1: never attached), then
+    # 3) most recently created: one pass, ordered by (last_attached, created)
+    return max(snap.sessions, key=lambda s: (s[0], s[1]))[2]
 
 def _active_pane_in_session(session: str) -> Optional[str]:
-    if not _tmux_ok():
+    if TMUX_BIN is None:
         return None
-    import subprocess
-    try:
-        out = subprocess.run([
-            "tmux", "list-panes", "-t", session, "-F", "#{window_index}.#{pane_index} #{?pane_active,1,0}"
-        ], capture_output=True, text=True, check=True)
-        lines = [l.strip() for l in out.stdout.splitlines() if l.strip()]
-        for l in lines:
-            idx, active = l.split()
-            if active == "1":
-                return f"{session}:{idx}"
-        if lines:
-            idx = lines[0].split()[0]
-            return f"{session}:{idx}"
-    except Exception:
+    out = _tmux_query(["list-panes", "-t", session, "-F", _FMT_PANE_ACTIVE])
+    if out is None:
         return None
-    return None
+    first = None
+    for l in out.splitlines():
+        idx, _, active = l.partition(" ")
+        if not idx:
+            continue
+        if active == "1":
+            return f"{session}:{idx}"
+        if first is None:
+            first = idx
+    return f"{session}:{first}" if first else None
 
 def _shell_friendly_pane_in_session(session: str) -> Optional[str]:
     """Return a pane in session likely running a shell (bash/zsh/fish/sh), else first pane.
     Format: session:win.pane
     """
-    if not _tmux_ok():
+    if TMUX_BIN is None:
         return None
-    import subprocess
-    try:
-        out = subprocess.run([
-            "tmux", "list-panes", "-t", session, "-F", "#{window_index}.#{pane_index} #{pane_current_command}"
-        ], capture_output=True, text=True, check=True)
-        shells = {"bash","zsh","fish","sh","nu"}
-        first = None
-        for line in out.stdout.splitlines():
-            line = line.strip()
-            if not line:
-                continue
-            idx, cmd = line.split(maxsplit=1)
-            if first is None:
-                first = idx
-            if cmd in shells:
-                return f"{session}:{idx}"
-        if first:
-            return f"{session}:{first}"
-    except Exception:
+    out = _tmux_query(["list-panes", "-t", session, "-F", _FMT_PANE_COMMAND])
+    if out is None:
         return None
-    return None
+    first = None
+    for l in out.splitlines():
+        idx, _, cmd = l.partition(" ")
+        if not idx:
+            continue
+        if first is None:
+            first = idx
+        if cmd in _SHELLS:
+            return f"{session}:{idx}"
+    return f"{session}:{first}" if first else None
 
 
-@app.tool()
-def tmux_run(
-    cmd: str,
-    target_key: str | None = None,
-    target: str | None = None,
-    session: str | None = None,
-    window: str | None = None,
-    pane: int | None = None,
-) -> dict:
-    """Run a long job under tmux via job-run and return the token.
+# Detached helpers still running (job-run lives until its job completes);
+# reaped without blocking on later spawns, as subprocess does for Popen.
+_SPAWNED: List[int] = []
+_SPAWNED_LOCK = threading.Lock()
+# Signals Python sets to SIG_IGN, which exec would otherwise pass on
+_SPAWN_SIGDEF = tuple(
+    getattr(signal, n) for n in ("SIGPIPE", "SIGXFSZ") if hasattr(signal, n)
+)
 
-    Args:
-        cmd: Shell command to execute under job-run.
 
-    Returns:
-        {"token": str}
+def _cloexec_inherited_fds() -> None:
+    """Mark fds >= 3 inherited from the MCP host close-on-exec.
+
+    Python creates its own fds non-inheritable, but posix_spawn (unlike
+    Popen's close_fds) would pass the host's pipes/files on to job-run,
+    which can outlive the server by hours.
     """
-    # Use the local bin scripts
-    repo_bin = Path(__file__).resolve().parents[1] / "bin"
-    job_run = repo_bin / "job-run"
-    if not job_run.exists():
-        raise RuntimeError(f"job-run not found at {job_run}")
+    try:
+        fds = [int(n) for n in os.listdir("/dev/fd")]
+    except (OSError, ValueError):
+        return
+    for fd in fds:
+        if fd > 2:
+            try:
+                os.set_inheritable(fd, False)
+            except OSError:
+                # The listdir's own (already closed) descriptor
+                pass
 
-    env = os.environ.copy()
-    env.setdefault("AGENTD_SESSION", SESSION)
-    # Do not force a global log dir here; job-run will prefer the target pane's cwd/mcp_log.
-    import subprocess
-    # Pre-generate a token so we can surface it (and log commands) immediately
-    ts = _dt.datetime.now().strftime("%Y%m%d%H%M%S")
-    tok_suffix = secrets.token_hex(3)  # 6 hex chars like agentd_rand
-    token = f"job-{ts}-{tok_suffix}"
-    env["JOB_TOKEN"] = token
 
-    args = [str(job_run), cmd]
+_cloexec_inherited_fds()
+
+
+def _reap_spawned() -> None:
+    with _SPAWNED_LOCK:
+        for pid in list(_SPAWNED):
+            try:
+                done, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done = pid
+            if done:
+                _SPAWNED.remove(pid)
+
+
+def _spawn_detached(args: List[str], env: Optional[Dict[str, str]] = None) -> None:
+    """Start a helper script in its own session, fully detached from our stdio.
+
+    stdin must not be inherited: with the STDIO transport it is the MCP
+    protocol stream. posix_spawn with setsid replaces Popen's fork+exec;
+    every fd >= 3 is close-on-exec (see _cloexec_inherited_fds), so
+    nothing else leaks.
+    Python ignores SIGPIPE/SIGXFSZ; like Popen(restore_signals=True) the
+    child gets the defaults back, or its pipelines (`... | head`) misreport.
+    """
+    _reap_spawned()
+    pid = os.posix_spawn(
+        args[0],
+        args,
+        os.environ if env is None else env,
+        file_actions=[
+            (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+            (os.POSIX_SPAWN_DUP2, 1, 2),
+        ],
+        setsid=True,
+        setsigdef=_SPAWN_SIGDEF,
+    )
+    with _SPAWNED_LOCK:
+        _SPAWNED.append(pid)
+
+
+def _resolve_target(
+    target: str | None,
+    session: str | None,
+    window: str | None,
+    pane: int | None,
+    saved: Optional[str],
+    snap: _TmuxSnapshot,
+) -> Tuple[str, str]:
+    """Pick the pane to notify and its session: (pane_target, session_name).
+
+    Explicit arguments return without touching tmux or the filesystem.
+    """
     # Priority (AUTO first when no explicit target):
     #   1) explicit target parameter
     #   2) explicit session/window/pane
     #   3) saved agent pane (~/.agentd/agent_pane)
     #   4) AUTO recent session (cli.0)
-    #   5) SELF_PANE (server launched inside tmux)
+    #   5) _self_pane() (server launched inside tmux)
     #   6) default SESSION:CLI_WINDOW.0
     if target:
-        env["JOB_TARGET_PANE"] = target
-        session_name = target.split(":", 1)[0] if ":" in target else (session or SESSION)
-    elif session:
-        w = window or os.environ.get("AGENTD_CLI_WINDOW", CLI_WINDOW)
-        p = pane if pane is not None else 0
-        session_name = session
-        env["JOB_TARGET_PANE"] = f"{session}:{w}.{p}"
-    else:
-        # Prefer the active pane of the most recently active session
-        pane_target = None
-        saved = _read_target()
-        if saved and _tmux_pane_exists(saved):
-            pane_target = saved
-        else:
-            auto = _auto_session()
-            if auto:
-                pane_target = _active_pane_in_session(auto)
-        if not pane_target and SELF_PANE:
-            pane_target = SELF_PANE
-        if not pane_target:
-            pane_target = f"{SESSION}:{CLI_WINDOW}.0"
-        env["JOB_TARGET_PANE"] = pane_target
-        session_name = pane_target.split(":", 1)[0]
+        return target, target.split(":", 1)[0] if ":" in target else (session or SESSION)
+    if session:
+        return f"{session}:{window or CLI_WINDOW}.{pane if pane is not None else 0}", session
+    # Prefer the active pane of the most recently active session
+    pane_target = saved
+    if not pane_target:
+        auto = _auto_session(snap)
+        if auto:
+            pane_target = _active_pane_in_session(auto)
+    if not pane_target:
+        pane_target = _self_pane()
+    if not pane_target:
+        pane_target = f"{SESSION}:{CLI_WINDOW}.0"
+    return pane_target, pane_target.split(":", 1)[0]
+
+
+def _tmux_run(
+    cmd: str,
+    target: str | None,
+    session: str | None,
+    window: str | None,
+    pane: int | None,
+) -> dict:
+    """Blocking body of tmux_run (run off the event loop)."""
+    # Snapshot first: the saved-pane check below then reuses it from the
+    # cache. An explicit target or session never consults the saved pane.
+    snap = _tmux_snapshot()
+    saved = None if target or session else _saved_target()
+    # Use the local bin scripts
+    job_run = _bin("job-run")
+    if not os.path.isfile(job_run):
+        raise RuntimeError(f"job-run not found at {job_run}")
+
+    # Per-job keys only; merged over _BASE_ENV once at launch
+    extra: Dict[str, str] = {}
+    # Do not force a global log dir here; job-run will prefer the target pane's cwd/mcp_log.
+    # Pre-generate a token so we can surface it (and log commands) immediately
+    ts = time.strftime("%Y%m%d%H%M%S")
+    tok_suffix = os.urandom(3).hex()  # 6 hex chars like agentd_rand
+    token = f"job-{ts}-{tok_suffix}"
+    extra["JOB_TOKEN"] = token
+
+    args = [str(job_run), cmd]
+    target_pane, session_name = _resolve_target(target, session, window, pane, saved, snap)
+    extra["JOB_TARGET_PANE"] = target_pane
 
     # Do NOT force JOB_SESSION here; let job-run decide exec session
     # based on AGENTD_EXEC_SESSION_MODE (default we set to 'self' below).
@@ -355,73 +883,62 @@ def tmux_run(
     # Compute useful view commands before launching
     # Try to predict log path using the target pane's cwd
     log_dir_guess = None
-    target_pane = env.get("JOB_TARGET_PANE")
+    # Looked up once; also used for the per_repo exec session below
+    pane_cwd: Optional[str] = None
     if target_pane:
         try:
-            import subprocess as _sp
-            cwd = _sp.run(["tmux", "display-message", "-p", "-t", target_pane, "#{pane_current_path}"], capture_output=True, text=True, check=True).stdout.strip()
-            if cwd:
-                log_dir_guess = str(Path(cwd) / "mcp_log")
+            pane_cwd = snap.panes.get(target_pane)
+            if pane_cwd is None:
+                info = _pane_info(target_pane)
+                pane_cwd = info[1] if info else None
+            if pane_cwd:
+                log_dir_guess = os.path.join(pane_cwd, "mcp_log")
         except Exception:
             log_dir_guess = None
     # Predict log path: prefer target pane's cwd/mcp_log; else repo mcp_log; else ~/.agentd/logs
     base_log_dir = log_dir_guess or (str(REPO_LOG_DIR) if REPO_LOG_DIR else None) or str(HOME_LOG_DIR)
-    log_path = str(Path(base_log_dir) / f"{token}.log")
+    log_path = os.path.join(base_log_dir, f"{token}.log")
     # Determine execution session consistent with job-run (self|fixed|per_repo)
-    exec_mode = env.get("AGENTD_EXEC_SESSION_MODE", "self")
+    exec_mode = _BASE_ENV.get("AGENTD_EXEC_SESSION_MODE", "self")
     exec_session: str
     if exec_mode == "self":
         exec_session = session_name
     elif exec_mode == "fixed":
-        exec_session = env.get("AGENTD_EXEC_SESSION", os.environ.get("AGENTD_EXEC_SESSION", "agentexec"))
+        exec_session = _BASE_ENV.get("AGENTD_EXEC_SESSION", "agentexec")
     else:
         # per_repo (default): exec-<basename of pane cwd>
-        try:
-            if target_pane:
-                import subprocess as _sp
-                cwd = _sp.run(["tmux", "display-message", "-p", "-t", target_pane, "#{pane_current_path}"], capture_output=True, text=True, check=True).stdout.strip()
-                base = Path(cwd).name if cwd else "exec"
-            else:
-                base = "exec"
-        except Exception:
-            base = "exec"
-        exec_session = env.get("AGENTD_EXEC_SESSION", f"exec-{base}")
+        base = os.path.basename(os.path.normpath(pane_cwd)) if pane_cwd else "exec"
+        exec_session = _BASE_ENV.get("AGENTD_EXEC_SESSION", f"exec-{base}")
 
     inside_cmd = f"tmux select-window -t '{exec_session}:{token}'"
     outside_cmd = f"tmux attach -t '{exec_session}' \\; select-window -t '{exec_session}:{token}'"
     tail_cmd = f"tail -f '{log_path}'"
 
     # Execution/session behavior: default to running in the caller's session (self)
-    env.setdefault("AGENTD_EXEC_SESSION_MODE", os.environ.get("AGENTD_EXEC_SESSION_MODE", "self"))
+    if "AGENTD_EXEC_SESSION_MODE" not in _BASE_ENV:
+        extra["AGENTD_EXEC_SESSION_MODE"] = "self"
     # By default, always notify the initiating (agent) pane.
     # If AGENTD_NOTIFY_FORCE_SHELL=1, reroute to a shell-friendly pane in the same session.
-    if env.get("JOB_TARGET_PANE"):
-        force_shell = env.get("AGENTD_NOTIFY_FORCE_SHELL", os.environ.get("AGENTD_NOTIFY_FORCE_SHELL", "0"))
+    if target_pane and "JOB_NOTIFY_PANE" not in _BASE_ENV:
+        force_shell = _BASE_ENV.get("AGENTD_NOTIFY_FORCE_SHELL", "0")
         if force_shell == "1":
             try:
-                sess = env["JOB_TARGET_PANE"].split(":",1)[0]
+                sess = target_pane.split(":",1)[0]
                 alt = _shell_friendly_pane_in_session(sess)
-                env.setdefault("JOB_NOTIFY_PANE", alt or env["JOB_TARGET_PANE"]) 
+                extra["JOB_NOTIFY_PANE"] = alt or target_pane
             except Exception:
-                env.setdefault("JOB_NOTIFY_PANE", env["JOB_TARGET_PANE"]) 
+                extra["JOB_NOTIFY_PANE"] = target_pane
         else:
-            env.setdefault("JOB_NOTIFY_PANE", env["JOB_TARGET_PANE"]) 
+            extra["JOB_NOTIFY_PANE"] = target_pane
 
     # Launch the job in the background (non-blocking for the MCP tool)
-    import subprocess as _sp
-    _sp.Popen(
-        args,
-        env=env,
-        stdout=_sp.DEVNULL,
-        stderr=_sp.DEVNULL,
-        start_new_session=True,
-    )
+    _spawn_detached(args, env={**_BASE_ENV, **extra})
 
     return {
         "token": token,
         "session": session_name,
         "exec_session": exec_session,
-        "target": env.get("JOB_TARGET_PANE"),
+        "target": target_pane,
         "log_path": log_path,
         "attach": outside_cmd,
         "view": {
@@ -433,33 +950,93 @@ def tmux_run(
 
 
 @app.tool()
-def tmux_stop(token: str, remove_log: bool = False) -> dict:
+async def tmux_run(
+    cmd: str,
+    target_key: str | None = None,
+    target: str | None = None,
+    session: str | None = None,
+    window: str | None = None,
+    pane: int | None = None,
+) -> dict:
+    """Run a long job under tmux via job-run and return the token.
+
+    Args:
+        cmd: Shell command to execute under job-run.
+
+    Returns:
+        {"token": str}
+    """
+    # Every step queries tmux or the filesystem: one hand-off to a worker
+    # thread keeps the event loop free. (Fetching the saved pane and the
+    # snapshot in parallel gained nothing: both wait on the same snapshot.)
+    return await asyncio.to_thread(_tmux_run, cmd, target, session, window, pane)
+
+
+@app.tool()
+def tmux_stop(token: str, remove_log: bool = False, wait: bool = False) -> dict:
     """Stop/cleanup a job by token: kill tmux windows and remove metadata files.
 
     Args:
         token: job token (e.g., 'job-2025...')
         remove_log: also delete the job log from the active log dir if True
+        wait: block until job-clean finishes and report its result
     Returns:
-        {"token": str, "cleaned": bool}
+        {"token": str, "cleaned": "dispatched"} by default,
+        {"token": str, "cleaned": bool} when wait is True
     """
-    import subprocess
     script = _bin("job-clean")
-    if not script.exists():
+    if not os.path.isfile(script):
         raise RuntimeError("job-clean not found")
     args = [str(script), token]
     if remove_log:
         args.append("--remove-log")
-    try:
-        subprocess.run(args, check=True, capture_output=True, text=True)
+    with _STATUS_CACHE_LOCK:
+        _STATUS_CACHE.pop(token, None)
+    if not wait:
+        # Cleanup runs in the background, like job-run in tmux_run
+        _spawn_detached(args)
+        return {"token": token, "cleaned": "dispatched"}
+    # One bytes pipe (stderr merged), decoded only when reporting a failure;
+    # stdin is the MCP stream and must not be inherited
+    r = subprocess.run(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if r.returncode == 0:
         return {"token": token, "cleaned": True}
-    except subprocess.CalledProcessError as e:
-        return {"token": token, "cleaned": False, "error": e.stderr or e.stdout}
+    return {"token": token, "cleaned": False, "error": r.stdout.decode("utf-8", errors="replace")}
+
+
+@app.tool()
+def tmux_status(token: str | None = None) -> dict:
+    """Report job status (exit code and log location).
+
+    Args:
+        token: job token; omit to report every known job
+    Returns:
+        {"token": str, "rc": int | None, "has_log": bool, "rc_path": str, "log_path": str},
+        or {"jobs": [...]} of the same when no token is given
+    """
+    if token:
+        return _job_status(token)
+    return {"jobs": list(_all_job_status().values())}
+
+
+@app.tool()
+def tmux_logs(token: str, tail: int | None = None, tail_bytes: int | None = None) -> dict:
+    """Return the log output of a job.
+
+    Args:
+        token: job token (e.g., 'job-2025...')
+        tail: only return the last N lines (reads from the end of the file)
+        tail_bytes: only return the last N bytes (one seek + read; overrides tail)
+    Returns:
+        {"token": str, "log_path": str, "text": str}
+    """
+    p = _job_log_path(token)
+    return {"token": token, "log_path": p, "text": _log_text(p, tail, tail_bytes)}
 
 
 """
-Note: For Self専用ミニマム運用のため、公開ツールは tmux.run のみ。
-ログや状態はファイル（mcp_log/ や ~/.agentd/）で確認できます。
-必要になれば tmux.status / tmux.logs / tmux.stop を再度公開してください。
+Note: 公開ツールは tmux.run / tmux.status / tmux.logs / tmux.stop。
+ログや状態はファイル（mcp_log/ や ~/.agentd/）でも確認できます。
 """
 
 
@@ -472,10 +1049,7 @@ def job_resource(token: str) -> dict:
 
 @app.resource("log://{token}")
 def log_resource(token: str) -> str:
-    p = _job_log_path(token)
-    if not p.exists():
-        return ""
-    return _read_text(p)
+    return _log_text(_job_log_path(token))
 
 
 # Note: FastMCP (current version) does not provide a notify_resources_updated helper.